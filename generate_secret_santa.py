@@ -4,10 +4,15 @@ Secret Santa Generator for La Famillia
 Generates random matches and individual HTML pages for each participant
 """
 
+import base64
+import functools
+import hashlib
 import random
-import json
+import secrets
 import string
+import sys
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -33,57 +38,94 @@ PARTICIPANTS = [
     "Léon"
 ]
 
-
-def generate_random_string(length=8):
-    """Generate a random string of letters and numbers"""
-    characters = string.ascii_lowercase + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
+# Translation table dropping combining diacritical marks (U+0300 to U+036F)
+COMBINING_MARKS = {
+    cp: None for cp in range(0x0300, 0x0370)
+    if unicodedata.category(chr(cp)) == 'Mn'
+}
 
 
+@functools.lru_cache(maxsize=None)
 def generate_filename(name):
     """Convert participant name to filename-friendly format"""
+    # Plain ASCII names have no accents to strip
+    if name.isascii():
+        return name.lower().replace(' ', '-')
+
     # Remove accents by normalizing to NFD and filtering out diacritics
     nfd = unicodedata.normalize('NFD', name)
-    without_accents = ''.join(c for c in nfd if unicodedata.category(c) != 'Mn')
+    if nfd == name:
+        without_accents = name
+    else:
+        without_accents = nfd.translate(COMBINING_MARKS)
     # Convert to lowercase and replace spaces with hyphens
     filename_base = without_accents.lower().replace(' ', '-')
     return filename_base
 
 
+def derange(n):
+    """
+    Generate a uniformly random derangement of range(n)
+    Returns a list where index i maps to a different index
+    """
+    # Keep trying until we get a valid derangement
+    max_attempts = 1000
+    for attempt in range(max_attempts):
+        indices = list(range(n))
+
+        # Fisher-Yates shuffle, restarting as soon as a position is
+        # finalized with an index mapping to itself
+        for i in range(n - 1, 0, -1):
+            j = random.randint(0, i)
+            indices[i], indices[j] = indices[j], indices[i]
+            if indices[i] == i:
+                break
+        else:
+            # Position 0 is only finalized once the shuffle completes
+            if n == 0 or indices[0] != 0:
+                return indices
+
+    raise Exception("Could not generate valid derangement after {} attempts".format(max_attempts))
+
+
 def generate_matches(participants):
     """
     Generate Secret Santa matches ensuring no one gets themselves
     Returns a dictionary mapping giver -> receiver
     """
-    receivers = participants.copy()
-    givers = participants.copy()
+    if len(participants) == 1:
+        raise Exception("Need at least two participants to generate a matching")
+
+    receivers = [participants[k] for k in derange(len(participants))]
     matches = {}
 
-    # Keep trying until we get a valid matching
-    max_attempts = 1000
-    for attempt in range(max_attempts):
-        random.shuffle(receivers)
+    # Create the matching dictionary
+    for i, giver in enumerate(participants):
+        matches[giver] = receivers[i]
+    return matches
 
-        # Check if anyone got themselves
-        valid = True
-        for i, giver in enumerate(givers):
-            if giver == receivers[i]:
-                valid = False
-                break
 
-        if valid:
-            # Create the matching dictionary
-            for i, giver in enumerate(givers):
-                matches[giver] = receivers[i]
-            return matches
+def generate_snowflakes(count=20):
+    """Generate static snowflake markup with random position and animation"""
+    snowflakes = []
+    for _ in range(count):
+        style = (
+            f"left: {random.random() * 100:.1f}%; "
+            f"animation-duration: {random.uniform(2, 5):.2f}s; "
+            f"animation-delay: {random.uniform(0, 5):.2f}s; "
+            f"opacity: {random.random():.2f}; "
+            f"font-size: {random.uniform(10, 20):.1f}px;"
+        )
+        snowflakes.append(f'    <div class="snowflake" style="{style}">❄</div>')
+    return '\n'.join(snowflakes)
 
-    raise Exception("Could not generate valid matching after {} attempts".format(max_attempts))
 
+# Snowflakes shared by every generated page, rendered once per run
+SNOWFLAKES_HTML = generate_snowflakes()
 
-def create_individual_page(giver, receiver, random_string):
-    """Generate HTML for individual participant page"""
 
-    html = f"""<!DOCTYPE html>
+# Individual page template, filled with {giver}, {receiver} and {snowflakes} (CSS/JS braces are doubled)
+INDIVIDUAL_PAGE_TEMPLATE = """<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -268,20 +310,7 @@ def create_individual_page(giver, receiver, random_string):
 </head>
 <body>
     <!-- Snowflakes -->
-    <script>
-        // Generate snowflakes
-        for (let i = 0; i < 20; i++) {{
-            let snowflake = document.createElement('div');
-            snowflake.className = 'snowflake';
-            snowflake.innerHTML = '❄';
-            snowflake.style.left = Math.random() * 100 + '%';
-            snowflake.style.animationDuration = (Math.random() * 3 + 2) + 's';
-            snowflake.style.animationDelay = Math.random() * 5 + 's';
-            snowflake.style.opacity = Math.random();
-            snowflake.style.fontSize = (Math.random() * 10 + 10) + 'px';
-            document.body.appendChild(snowflake);
-        }}
-    </script>
+{snowflakes}
 
     <div class="container">
         <div class="header">
@@ -343,13 +372,27 @@ def create_individual_page(giver, receiver, random_string):
 </body>
 </html>"""
 
-    return html
+
+# Individual page split into UTF-8 encoded segments around the giver and receiver names
+INDIVIDUAL_PAGE_SEGMENTS = [
+    segment.encode('utf-8')
+    for segment in INDIVIDUAL_PAGE_TEMPLATE.format_map({
+        'giver': '\0',
+        'receiver': '\0',
+        'snowflakes': SNOWFLAKES_HTML,
+    }).split('\0')
+]
 
 
-def create_landing_page():
-    """Generate the landing page HTML"""
+@functools.lru_cache(maxsize=512)
+def create_individual_page(giver, receiver):
+    """Generate UTF-8 encoded HTML for individual participant page"""
+    prefix, middle, suffix = INDIVIDUAL_PAGE_SEGMENTS
+    return prefix + giver.encode('utf-8') + middle + receiver.encode('utf-8') + suffix
 
-    html = """<!DOCTYPE html>
+
+# Landing page template (index.html), filled with $snowflakes
+LANDING_PAGE_TEMPLATE = string.Template("""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -445,20 +488,7 @@ def create_landing_page():
 </head>
 <body>
     <!-- Snowflakes -->
-    <script>
-        // Generate snowflakes
-        for (let i = 0; i < 20; i++) {
-            let snowflake = document.createElement('div');
-            snowflake.className = 'snowflake';
-            snowflake.innerHTML = '❄';
-            snowflake.style.left = Math.random() * 100 + '%';
-            snowflake.style.animationDuration = (Math.random() * 3 + 2) + 's';
-            snowflake.style.animationDelay = Math.random() * 5 + 's';
-            snowflake.style.opacity = Math.random();
-            snowflake.style.fontSize = (Math.random() * 10 + 10) + 'px';
-            document.body.appendChild(snowflake);
-        }
-    </script>
+$snowflakes
 
     <div class="container">
         <div class="decoration">🎄 ⭐ 🎄</div>
@@ -486,31 +516,54 @@ def create_landing_page():
     </div>
     <div style="position: fixed; bottom: 5px; right: 10px; font-size: 10px; color: #999; opacity: 0.5;">v1.0.1</div>
 </body>
-</html>"""
+</html>""")
+
+# Version marker of the landing page, ignoring the per-run snowflakes
+LANDING_PAGE_VERSION = hashlib.sha256(LANDING_PAGE_TEMPLATE.template.encode('utf-8')).hexdigest()[:8]
+LANDING_PAGE_MARKER = f"<!--v:{LANDING_PAGE_VERSION}-->"
 
-    return html
+# Landing page HTML, starting with its version marker
+LANDING_PAGE_HTML = LANDING_PAGE_MARKER + "\n" + LANDING_PAGE_TEMPLATE.substitute(snowflakes=SNOWFLAKES_HTML)
+
+
+def create_landing_page():
+    """Generate the landing page HTML"""
+    return LANDING_PAGE_HTML
+
+
+def is_landing_page_current(path):
+    """Check whether an existing landing page was built from the current template"""
+    if not path.exists():
+        return False
+    with path.open('rb') as f:
+        return LANDING_PAGE_MARKER.encode('utf-8') in f.readline()
 
 
 def main():
     """Main function to generate all Secret Santa files"""
 
-    print("🎄 Secret Santa Generator for La Famillia 🎄\n")
+    # Collect output and write it to stdout in one go at the end
+    log = []
+
+    log.append("🎄 Secret Santa Generator for La Famillia 🎄\n")
 
     # Output directory is current directory (root)
     output_dir = Path(".")
 
     # Generate matches
-    print("Generating Secret Santa matches...")
+    log.append("Generating Secret Santa matches...")
     matches = generate_matches(PARTICIPANTS)
 
     # Generate unique URLs and mapping
     url_mapping = {}
+    output_files = []
+    html_contents = []
 
-    print("\nGenerating HTML pages...")
+    log.append("\nGenerating HTML pages...")
 
     for giver, receiver in matches.items():
         # Generate random string for URL
-        random_string = generate_random_string()
+        random_string = base64.b32encode(secrets.token_bytes(5)).decode('ascii').lower()
 
         # Create filename
         filename_base = generate_filename(giver)
@@ -523,38 +576,53 @@ def main():
             "url": f"https://targz.github.io/secret-santa-2025/{filename}"
         }
 
-        # Generate and save HTML
-        html_content = create_individual_page(giver, receiver, random_string)
-        output_file = output_dir / filename
-        output_file.write_text(html_content, encoding='utf-8')
+        # Generate HTML
+        html_content = create_individual_page(giver, receiver)
+        output_files.append(output_dir / filename)
+        html_contents.append(html_content)
 
-        print(f"✓ Created: {filename}")
+    # Save all pages concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(Path.write_bytes, output_files, html_contents))
+
+    for output_file in output_files:
+        log.append(f"✓ Created: {output_file.name}")
 
     # Create landing page
-    print("\nCreating landing page...")
-    index_html = create_landing_page()
-    (output_dir / "index.html").write_text(index_html, encoding='utf-8')
-    print("✓ Created: index.html")
+    log.append("\nCreating landing page...")
+    index_file = output_dir / "index.html"
+    landing_page_current = is_landing_page_current(index_file)
+    if landing_page_current:
+        log.append("✓ Up to date: index.html")
+    else:
+        index_html = create_landing_page()
+        index_file.write_text(index_html, encoding='utf-8')
+        log.append("✓ Created: index.html")
 
     # Note: JSON mapping file generation has been disabled to prevent overwriting
     # The original mapping file is protected and should not be regenerated
-    print("\n⚠️  JSON mapping file generation disabled (to protect existing matches)")
+    log.append("\n⚠️  JSON mapping file generation disabled (to protect existing matches)")
 
     # Print summary
-    print("\n" + "="*60)
-    print("✅ Generation complete!")
-    print("="*60)
-    print(f"\nFiles generated in current directory:")
-    print(f"  - index.html (landing page)")
-    print(f"  - {len(matches)} individual participant pages")
-    print("\n📧 URLs to distribute:")
-    print("-" * 60)
+    log.append("\n" + "="*60)
+    log.append("✅ Generation complete!")
+    log.append("="*60)
+    log.append(f"\nFiles generated in current directory:")
+    if landing_page_current:
+        log.append(f"  - index.html (landing page, already up to date)")
+    else:
+        log.append(f"  - index.html (landing page)")
+    log.append(f"  - {len(matches)} individual participant pages")
+    log.append("\n📧 URLs to distribute:")
+    log.append("-" * 60)
 
     for giver in sorted(url_mapping.keys()):
         info = url_mapping[giver]
-        print(f"{giver:25} → {info['url']}")
+        log.append(f"{giver:25} → {info['url']}")
+
+    log.append("\n🎁 Joyeux Noël et bon Secret Santa! 🎁")
 
-    print("\n🎁 Joyeux Noël et bon Secret Santa! 🎁")
+    sys.stdout.write('\n'.join(log) + '\n')
 
 
 if __name__ == "__main__":